@@ -0,0 +1,133 @@
+# analysis_cache.py
+import hashlib
+import json
+import os
+import threading
+import requests
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ANALYSIS_CACHE_DIR = os.getenv("ANALYSIS_CACHE_DIR", "cache/analysis")
+ANALYSIS_CACHE_MAX_BYTES = int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+_lock = threading.Lock()
+_weights_fingerprints = {}  # path -> ((size, mtime_ns), sha256)
+
+
+def _file_fingerprint(path):
+    """Hash del contenido de un archivo, recalculado solo si cambia su tamaño o mtime."""
+    stat = os.stat(path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    cached = _weights_fingerprints.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    _weights_fingerprints[path] = (signature, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def _url_fingerprint(url):
+    # Validadores HTTP del recurso: sin ETag ni Last-Modified no se puede saber si el video cambió
+    try:
+        response = requests.head(url, allow_redirects=True, timeout=5)
+    except requests.RequestException as e:
+        print(f"Error checking video URL for analysis cache: {e}")
+        return None
+    if not response.ok:
+        return None
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if not etag and not last_modified:
+        return None
+    return f"url:{url}:{response.headers.get('Content-Length', '')}:{etag or ''}:{last_modified or ''}"
+
+
+def _video_fingerprint(video_source):
+    # Archivos locales: ruta + tamaño + mtime. URLs HTTP: tamaño + ETag/Last-Modified.
+    if os.path.isfile(video_source):
+        stat = os.stat(video_source)
+        return f"file:{os.path.abspath(video_source)}:{stat.st_size}:{stat.st_mtime_ns}"
+    if video_source.startswith(("http://", "https://")):
+        return _url_fingerprint(video_source)
+    return None
+
+
+def make_key(video_source, weights_paths, config):
+    """Clave de cache: video + pesos de los modelos (best.pt) + configuración del analizador.
+
+    Devuelve None si el video no se puede identificar de forma fiable; en ese caso no se cachea.
+    """
+    video = _video_fingerprint(video_source)
+    if video is None:
+        return None
+    payload = {
+        "video": video,
+        "weights": [_file_fingerprint(path) for path in weights_paths],
+        "config": config,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(ANALYSIS_CACHE_DIR, f"{key}.json")
+
+
+def get(key):
+    """Devuelve el resultado cacheado ({"indicators", "timeline"}) o None."""
+    path = _entry_path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        os.utime(path, None)  # Marca el acceso para el LRU
+        print(f"Analysis cache hit: {key}")
+        return entry
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Error reading analysis cache entry {key}: {e}")
+        return None
+
+
+def put(key, indicators, timeline):
+    try:
+        os.makedirs(ANALYSIS_CACHE_DIR, exist_ok=True)
+        path = _entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"indicators": indicators, "timeline": timeline}, f)
+        os.replace(tmp_path, path)
+        print(f"Stored analysis cache entry: {key}")
+        _evict()
+    except OSError as e:
+        print(f"Error writing analysis cache entry {key}: {e}")
+
+
+def _evict():
+    # Elimina las entradas usadas menos recientemente hasta respetar el límite de tamaño
+    with _lock:
+        entries = []
+        total = 0
+        for name in os.listdir(ANALYSIS_CACHE_DIR):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(ANALYSIS_CACHE_DIR, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= ANALYSIS_CACHE_MAX_BYTES:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                print(f"Evicted analysis cache entry: {path}")
+            except FileNotFoundError:
+                pass
@@ -8,6 +8,7 @@ from database import get_db
 from models import User
 from schemas import UserCreate, Token, Login
 from schemas import PasswordReset
+import users_version
 import os
 from dotenv import load_dotenv
 
@@ -78,6 +79,7 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     )
     db.add(db_user)
     db.commit()
+    users_version.bump()
     db.refresh(db_user)
     access_token = create_access_token(data={"sub": user.email})
     return {"access_token": access_token, "token_type": "bearer"}
@@ -0,0 +1,140 @@
+# benchmark_frame_loop.py
+"""Compara el bucle de frames con asignaciones por frame frente a FrameBuffers.
+
+Simula muchas sesiones concurrentes (intercaladas frame a frame, como en el
+servidor) con frames y landmarks sintéticos, sin cargar FaceMesh ni YOLO, y
+reporta memoria asignada por frame, colecciones del GC y tiempo en pausas.
+Los arrays de NumPy no los sigue el GC cíclico, así que la reducción es de
+memoria asignada por frame; en ambos caminos el GC no llega a ejecutarse.
+
+Uso: python benchmark_frame_loop.py [sesiones] [frames_por_sesion]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+import cv2
+import numpy as np
+from frame_buffers import FrameBuffers, FRAME_SIZE, POINTS_IDS
+
+
+def make_face_landmarks(rng):
+    landmark = [SimpleNamespace(x=float(x), y=float(y)) for x, y in rng.uniform(0.2, 0.8, size=(468, 2))]
+    return SimpleNamespace(landmark=landmark)
+
+
+def allocating_step(frame, face_landmarks, _state):
+    # Réplica del bucle original: nuevo frame, nueva copia RGB y lista de tuplas por frame
+    frame = cv2.resize(frame, FRAME_SIZE)
+    image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    ih, iw, _ = frame.shape
+    points = []
+    for point_id in POINTS_IDS:
+        lm = face_landmarks.landmark[point_id]
+        points.append((int(lm.x * iw), int(lm.y * ih)))
+    x1, y1 = points[0]
+    x2, _ = points[1]
+    _, y3 = points[2]
+    return image_rgb, frame[y1:y3, x1:x2]
+
+
+def buffered_step(frame, face_landmarks, buffers):
+    buffers.resize(frame)
+    image_rgb = buffers.to_rgb()
+    buffers.extract_points(face_landmarks)
+    return image_rgb, buffers.rois()[0]
+
+
+class GCTimer:
+    def __init__(self):
+        self.collections = 0
+        self.pause = 0.0
+        self._start = None
+
+    def __call__(self, phase, info):
+        if phase == "start":
+            self._start = time.perf_counter()
+        elif self._start is not None:
+            self.pause += time.perf_counter() - self._start
+            self.collections += 1
+            self._start = None
+
+
+def run(step, make_state, sessions, frames):
+    rng = np.random.default_rng(0)
+    source = rng.integers(0, 256, size=(480, 640, 3), dtype=np.uint8)
+    face_landmarks = make_face_landmarks(rng)
+
+    def play(measure_step):
+        states = [make_state() for _ in range(sessions)]
+        # Cada sesión retiene su último resultado, como el generador mientras se codifica el frame
+        held = [None] * sessions
+        for _ in range(frames):
+            for i in range(sessions):
+                held[i] = measure_step(states[i])
+
+    # Pasada sin tracemalloc: tiempo por frame y pausas del GC
+    gc.collect()
+    timer = GCTimer()
+    gc.callbacks.append(timer)
+    start = time.perf_counter()
+    try:
+        play(lambda state: step(source, face_landmarks, state))
+    finally:
+        gc.callbacks.remove(timer)
+    elapsed = time.perf_counter() - start
+
+    # Pasada con tracemalloc: bytes asignados por frame. Se mide el pico durante el paso sobre el nivel
+    # inicial, con el resultado anterior todavía vivo, así que liberar el frame previo no descuenta nada
+    # y los temporales liberados dentro del paso sí cuentan.
+    allocated = 0
+    peak_total = 0
+
+    def traced_step(state):
+        nonlocal allocated, peak_total
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = step(source, face_landmarks, state)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - before
+        peak_total = max(peak_total, peak)
+        return result
+
+    gc.collect()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    try:
+        play(traced_step)
+    finally:
+        tracemalloc.stop()
+    peak = peak_total
+
+    total_frames = sessions * frames
+    return {
+        "bytes_per_frame": allocated / total_frames,
+        "peak_mb": (peak - base) / (1024 * 1024),
+        "gc_collections": timer.collections,
+        "gc_pause_us_per_frame": timer.pause / total_frames * 1e6,
+        "us_per_frame": elapsed / total_frames * 1e6,
+    }
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    print(f"{sessions} sesiones x {frames} frames")
+    results = {
+        "allocating": run(allocating_step, lambda: None, sessions, frames),
+        "buffered": run(buffered_step, lambda: FrameBuffers(FRAME_SIZE, POINTS_IDS), sessions, frames),
+    }
+    for name, r in results.items():
+        print(
+            f"{name:>10}: {r['bytes_per_frame']:10.0f} B/frame  peak {r['peak_mb']:7.1f} MB  "
+            f"gc {r['gc_collections']:5d}  gc pause {r['gc_pause_us_per_frame']:7.2f} us/frame  "
+            f"{r['us_per_frame']:8.1f} us/frame"
+        )
+
+
+if __name__ == "__main__":
+    main()
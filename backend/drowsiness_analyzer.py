@@ -6,8 +6,24 @@ from sqlalchemy.orm import Session
 from models import VideoProcessing
 from datetime import datetime
 import pytz  # Importa pytz para manejar zonas horarias
+import time
+import analysis_cache
+from frame_buffers import FrameBuffers, FRAME_SIZE, POINTS_IDS
+from session_table import sessions
 
 class DrowsinessAnalyzer:
+    # Subir al cambiar la lógica de análisis (recortes, conteo de tiempos...): invalida la cache de análisis
+    ANALYZER_VERSION = 2
+    YAWN_MODEL_PATH = "runs/detectyawn/train/weights/best.pt"
+    EYE_MODEL_PATH = "runs/detecteye/train/weights/best.pt"
+    POINTS_IDS = POINTS_IDS
+    FRAME_SIZE = FRAME_SIZE
+    PROCESS_EVERY_N_FRAMES = 3
+    EYE_CONF = 0.3
+    YAWN_CONF = 0.5
+    FACE_DETECTION_CONF = 0.5
+    FACE_TRACKING_CONF = 0.5
+
     def __init__(self, video_source, user_id, db: Session, is_stream=False):
         self.video_source = video_source
         self.user_id = user_id
@@ -17,42 +33,89 @@ class DrowsinessAnalyzer:
         self.yawn_state = ''
         self.left_eye_state = ''
         self.right_eye_state = ''
-        
-        self.blinks = 0
-        self.microsleeps = 0.0
-        self.yawns = 0
-        self.yawn_duration = 0.0
-        
-        self.left_eye_still_closed = False
-        self.right_eye_still_closed = False
-        self.yawn_in_progress = False
 
-        # Define MediaPipe landmark indices for face regions
-        self.points_ids = [187, 411, 152, 68, 174, 399, 298]  # Mouth and eye landmarks
+        # Contadores y flags de parpadeo/bostezo en la tabla compartida de sesiones (ver session_table.py)
+        self.slot = None
+
+        # Evolución de los indicadores (solo cuando cambian), usada por la cache de análisis
+        self.timeline = []
+        self.completed = False
+
+        # Ajustables por el controlador de carga entre frames (ver load_controller.py)
+        self.process_every_n_frames = self.PROCESS_EVERY_N_FRAMES
+        self.last_inference_seconds = None
+        self.degraded = False
+
+        self.points_ids = self.POINTS_IDS
+        self.buffers = FrameBuffers(self.FRAME_SIZE, self.points_ids)
 
         try:
-            self.face_mesh = mp.solutions.face_mesh.FaceMesh(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+            self.face_mesh = mp.solutions.face_mesh.FaceMesh(
+                min_detection_confidence=self.FACE_DETECTION_CONF,
+                min_tracking_confidence=self.FACE_TRACKING_CONF
+            )
             print("MediaPipe FaceMesh initialized")
         except Exception as e:
             print(f"Error initializing FaceMesh: {e}")
             raise
 
         try:
-            self.detectyawn = YOLO("runs/detectyawn/train/weights/best.pt")
-            self.detecteye = YOLO("runs/detecteye/train/weights/best.pt")
+            self.detectyawn = YOLO(self.YAWN_MODEL_PATH)
+            self.detecteye = YOLO(self.EYE_MODEL_PATH)
             print("YOLO models loaded successfully")
         except Exception as e:
             print(f"Error loading YOLO models: {e}")
             raise
 
-        print(f"Initialized DrowsinessAnalyzer for user {user_id}, video_source: {video_source}, is_stream: {is_stream}")
+        self.slot = sessions.allocate()
+        print(f"Initialized DrowsinessAnalyzer for user {user_id}, video_source: {video_source}, is_stream: {is_stream}, slot: {self.slot}")
+
+    @property
+    def blinks(self):
+        return int(sessions.blinks[self.slot])
+
+    @property
+    def microsleeps(self):
+        return float(sessions.microsleeps[self.slot])
+
+    @property
+    def yawns(self):
+        return int(sessions.yawns[self.slot])
+
+    @property
+    def yawn_duration(self):
+        return float(sessions.yawn_duration[self.slot])
+
+    def close(self):
+        """Libera el slot de la tabla de sesiones; llamar después de save_report."""
+        if self.slot is not None:
+            sessions.release(self.slot)
+            self.slot = None
+
+    @classmethod
+    def cache_key(cls, video_source):
+        """Clave de la cache de análisis para un video grabado; cambia si cambian los pesos o la configuración."""
+        config = {
+            "analyzer_version": cls.ANALYZER_VERSION,
+            "points_ids": cls.POINTS_IDS,
+            "frame_size": list(cls.FRAME_SIZE),
+            "process_every_n_frames": cls.PROCESS_EVERY_N_FRAMES,
+            "eye_conf": cls.EYE_CONF,
+            "yawn_conf": cls.YAWN_CONF,
+            "face_detection_conf": cls.FACE_DETECTION_CONF,
+            "face_tracking_conf": cls.FACE_TRACKING_CONF,
+        }
+        return analysis_cache.make_key(video_source, [cls.YAWN_MODEL_PATH, cls.EYE_MODEL_PATH], config)
+
+    def indicators(self):
+        return sessions.indicators(self.slot)
 
     def predict_eye(self, eye_frame, eye_state):
         if eye_frame is None or eye_frame.size == 0:
             print("Empty or invalid eye frame, skipping prediction")
             return eye_state
         try:
-            results_eye = self.detecteye.predict(eye_frame, verbose=False, conf=0.3)
+            results_eye = self.detecteye.predict(eye_frame, verbose=False, conf=self.EYE_CONF)
             boxes = results_eye[0].boxes
             if len(boxes) == 0:
                 print("No eye detections")
@@ -79,7 +142,7 @@ class DrowsinessAnalyzer:
             print("Empty or invalid yawn frame, skipping prediction")
             return self.yawn_state
         try:
-            results_yawn = self.detectyawn.predict(yawn_frame, verbose=False, conf=0.5)
+            results_yawn = self.detectyawn.predict(yawn_frame, verbose=False, conf=self.YAWN_CONF)
             boxes = results_yawn[0].boxes
             if len(boxes) == 0:
                 print("No yawn detections")
@@ -111,92 +174,68 @@ class DrowsinessAnalyzer:
         fps = cap.get(cv2.CAP_PROP_FPS) if not self.is_stream else 30
         frame_duration = 1.0 / fps if fps > 0 else 0.033
         frame_count = 0
-        process_every_n_frames = 3
+        last_processed_frame = 0
 
         try:
             while True:
                 ret, frame = cap.read()
                 if not ret or frame is None:
                     print(f"Failed to read frame from video source: {self.video_source}")
+                    # Solo cuenta como video completo si se llegó al final reportado, no ante un error de red o decodificación
+                    total_frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+                    position = max(frame_count, cap.get(cv2.CAP_PROP_POS_FRAMES))
+                    self.completed = not self.is_stream and total_frames > 0 and position >= total_frames
                     break
 
-                frame = cv2.resize(frame, (320, 180))
+                # El frame redimensionado vive en un buffer reutilizado: solo es válido hasta el siguiente frame
+                frame = self.buffers.resize(frame)
                 frame_count += 1
-                if frame_count % process_every_n_frames != 0:
-                    yield {
-                        "blinks": self.blinks,
-                        "microsleeps": round(self.microsleeps, 2),
-                        "yawns": self.yawns,
-                        "yawn_duration": round(self.yawn_duration, 2)
-                    }, frame
+                frames_since_processed = frame_count - last_processed_frame
+                if frames_since_processed < self.process_every_n_frames:
+                    self.last_inference_seconds = None
+                    yield self.indicators(), frame
                     continue
+                last_processed_frame = frame_count
+                if self.process_every_n_frames > self.PROCESS_EVERY_N_FRAMES:
+                    self.degraded = True
+                inference_start = time.perf_counter()
 
-                image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                image_rgb = self.buffers.to_rgb()
                 results = self.face_mesh.process(image_rgb)
                 print(f"Frame {frame_count}: FaceMesh processed, landmarks detected: {bool(results.multi_face_landmarks)}")
 
                 if results.multi_face_landmarks:
                     for face_landmarks in results.multi_face_landmarks:
-                        ih, iw, _ = frame.shape
-                        points = []
-
-                        for point_id in self.points_ids:
-                            lm = face_landmarks.landmark[point_id]
-                            x, y = int(lm.x * iw), int(lm.y * ih)
-                            points.append((x, y))
-
-                        if len(points) >= 7:
-                            x1, y1 = points[0]  # Mouth top
-                            x2, _ = points[1]   # Mouth right
-                            _, y3 = points[2]   # Mouth bottom
-                            x4, y4 = points[3]  # Right eye top
-                            x5, y5 = points[4]  # Right eye bottom
-                            x6, y6 = points[5]  # Left eye top
-                            x7, y7 = points[6]  # Left eye bottom
-
-                            x6, x7 = min(x6, x7), max(x6, x7)
-                            y6, y7 = min(y6, y7), max(y6, y7)
-
-                            mouth_roi = frame[y1:y3, x1:x2]
-                            right_eye_roi = frame[y4:y5, x4:x5]
-                            left_eye_roi = frame[y6:y7, x6:x7]
-
-                            try:
-                                self.left_eye_state = self.predict_eye(left_eye_roi, self.left_eye_state)
-                                self.right_eye_state = self.predict_eye(right_eye_roi, self.right_eye_state)
-                                self.predict_yawn(mouth_roi)
-                                print(f"Frame {frame_count}: Processed - blinks={self.blinks}, yawns={self.yawns}, left_eye={self.left_eye_state}, right_eye={self.right_eye_state}, yawn_state={self.yawn_state}")
-                            except Exception as e:
-                                print(f"Error en la predicción para frame {frame_count}: {e}")
-                                continue
-
-                            if self.left_eye_state == "Close Eye" and self.right_eye_state == "Close Eye":
-                                if not self.left_eye_still_closed and not self.right_eye_still_closed:
-                                    self.left_eye_still_closed, self.right_eye_still_closed = True, True
-                                    self.blinks += 1
-                                    print(f"Blink detected, total blinks: {self.blinks}")
-                                self.microsleeps += frame_duration * process_every_n_frames
-                            else:
-                                if self.left_eye_still_closed and self.right_eye_still_closed:
-                                    self.left_eye_still_closed, self.right_eye_still_closed = False, False
-                                self.microsleeps = max(0, self.microsleeps - frame_duration * process_every_n_frames)
-
-                            if self.yawn_state == "Yawn":
-                                if not self.yawn_in_progress:
-                                    self.yawn_in_progress = True
-                                    self.yawns += 1
-                                    print(f"Yawn detected, total yawns: {self.yawns}")
-                                self.yawn_duration += frame_duration * process_every_n_frames
-                            else:
-                                if self.yawn_in_progress:
-                                    self.yawn_in_progress = False
-
-                yield {
-                    "blinks": self.blinks,
-                    "microsleeps": round(self.microsleeps, 2),
-                    "yawns": self.yawns,
-                    "yawn_duration": round(self.yawn_duration, 2)
-                }, frame
+                        self.buffers.extract_points(face_landmarks)
+
+                        mouth_roi, right_eye_roi, left_eye_roi = self.buffers.rois()
+
+                        try:
+                            self.left_eye_state = self.predict_eye(left_eye_roi, self.left_eye_state)
+                            self.right_eye_state = self.predict_eye(right_eye_roi, self.right_eye_state)
+                            self.predict_yawn(mouth_roi)
+                            print(f"Frame {frame_count}: Processed - blinks={self.blinks}, yawns={self.yawns}, left_eye={self.left_eye_state}, right_eye={self.right_eye_state}, yawn_state={self.yawn_state}")
+                        except Exception as e:
+                            print(f"Error en la predicción para frame {frame_count}: {e}")
+                            continue
+
+                        blinks, yawns = self.blinks, self.yawns
+                        sessions.update(
+                            [self.slot],
+                            [self.left_eye_state == "Close Eye" and self.right_eye_state == "Close Eye"],
+                            [self.yawn_state == "Yawn"],
+                            frame_duration * frames_since_processed
+                        )
+                        if self.blinks != blinks:
+                            print(f"Blink detected, total blinks: {self.blinks}")
+                        if self.yawns != yawns:
+                            print(f"Yawn detected, total yawns: {self.yawns}")
+
+                self.last_inference_seconds = time.perf_counter() - inference_start
+                indicators = self.indicators()
+                if not self.timeline or self.timeline[-1]["indicators"] != indicators:
+                    self.timeline.append({"time": round(frame_count * frame_duration, 3), "indicators": indicators})
+                yield indicators, frame
 
         finally:
             cap.release()
@@ -0,0 +1,64 @@
+# frame_buffers.py
+import cv2
+import numpy as np
+
+# Define MediaPipe landmark indices for face regions
+POINTS_IDS = [187, 411, 152, 68, 174, 399, 298]  # Mouth and eye landmarks
+FRAME_SIZE = (320, 180)
+
+
+class FrameBuffers:
+    """Buffers preasignados para el bucle de frames de una sesión de análisis.
+
+    El frame redimensionado, su copia RGB y los puntos de referencia se escriben
+    siempre en los mismos arrays, así que cada frame no genera memoria nueva.
+    Los arrays devueltos (y las ROIs, que son vistas) solo son válidos hasta el
+    siguiente frame.
+    """
+
+    def __init__(self, frame_size, points_ids):
+        width, height = frame_size
+        self.frame_size = frame_size
+        self.points_ids = points_ids
+        self.frame = np.empty((height, width, 3), dtype=np.uint8)
+        self.rgb = np.empty((height, width, 3), dtype=np.uint8)
+        # float64, igual que int(lm.x * iw) en Python: en float32 el producto redondea distinto y cambia ROIs en 1 px
+        self._landmarks = np.empty((len(points_ids), 2), dtype=np.float64)
+        self._scale = np.array([width, height], dtype=np.float64)
+        self.points = np.empty((len(points_ids), 2), dtype=np.int32)
+
+    def resize(self, frame):
+        cv2.resize(frame, self.frame_size, dst=self.frame)
+        return self.frame
+
+    def to_rgb(self):
+        cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB, dst=self.rgb)
+        return self.rgb
+
+    def extract_points(self, face_landmarks):
+        # Los landmarks de MediaPipe son mensajes protobuf sin acceso en bloque, así que la lectura es un
+        # bucle sobre los 7 puntos; el escalado a píxeles sí es un solo paso y el cast trunca hacia cero como int()
+        landmark = face_landmarks.landmark
+        for i, point_id in enumerate(self.points_ids):
+            lm = landmark[point_id]
+            self._landmarks[i, 0] = lm.x
+            self._landmarks[i, 1] = lm.y
+        np.multiply(self._landmarks, self._scale, out=self._landmarks)
+        np.copyto(self.points, self._landmarks, casting="unsafe")
+        return self.points
+
+    def rois(self):
+        """Vistas (sin copia) de boca, ojo derecho y ojo izquierdo sobre el frame actual."""
+        p = self.points
+        x1, y1 = p[0]  # Mouth top
+        x2 = p[1, 0]   # Mouth right
+        y3 = p[2, 1]   # Mouth bottom
+        x4, y4 = p[3]  # Right eye top
+        x5, y5 = p[4]  # Right eye bottom
+        x6, x7 = sorted((p[5, 0], p[6, 0]))  # Left eye top / bottom
+        y6, y7 = sorted((p[5, 1], p[6, 1]))
+
+        mouth_roi = self.frame[y1:y3, x1:x2]
+        right_eye_roi = self.frame[y4:y5, x4:x5]
+        left_eye_roi = self.frame[y6:y7, x6:x7]
+        return mouth_roi, right_eye_roi, left_eye_roi
@@ -0,0 +1,271 @@
+# load_controller.py
+import asyncio
+import itertools
+import os
+import time
+from collections import deque
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# El análisis corre en el hilo del event loop, así que por defecto hay un solo "worker" de inferencia
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "1"))
+MAX_QUEUED_SESSIONS = int(os.getenv("MAX_QUEUED_SESSIONS", "20"))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("QUEUE_TIMEOUT_SECONDS", "30"))
+
+NOMINAL_SOURCE_FPS = 30
+DEFAULT_INFERENCE_SECONDS = 0.05  # Estimación inicial hasta medir frames reales
+EWMA_ALPHA = 0.1
+
+# Umbrales de utilización (demanda nominal / capacidad) para cada etapa
+PREVIEW_STAGE_UTILIZATION = 0.7   # Etapa 1: menos FPS de vista previa y menor calidad JPEG
+ANALYSIS_STAGE_UTILIZATION = 0.9  # Etapa 2: menor tasa de análisis para conductores alertas
+ADMISSION_UTILIZATION = 1.0       # Etapa 3: nuevas sesiones a la cola o rechazadas
+
+PREVIEW_EVERY_N_FRAMES = 2
+DEGRADED_JPEG_QUALITY = 30
+LOW_RISK_ANALYSIS_FACTOR = 2
+
+# Riesgo según comportamiento reciente: ojos cerrados más que un parpadeo normal (el indicador de
+# microsueños baja solo cuando se abren) o un bostezo en los últimos RISK_WINDOW_SECONDS.
+# La sesión vuelve a riesgo bajo cuando pasa la ventana sin señales.
+HIGH_RISK_MICROSLEEPS = 0.3
+RISK_WINDOW_SECONDS = 60
+
+
+class AnalysisSession:
+    def __init__(self, session_id, user_id, base_every_n_frames):
+        self.id = session_id
+        self.user_id = user_id
+        self.base_every_n_frames = base_every_n_frames
+        self.nominal_rate = NOMINAL_SOURCE_FPS / base_every_n_frames
+        self.high_risk = False
+        self.last_risk_time = None
+        self.last_yawns = 0
+        self.analysis_degraded = False
+        self.frame_count = 0
+
+
+class LoadController:
+    """Admisión de sesiones de análisis y degradación de calidad por etapas según la carga de inferencia.
+
+    La demanda nominal y la de conductores de riesgo bajo se mantienen como totales que se actualizan
+    al admitir, liberar o escalar una sesión, así que consultar la etapa en cada frame es O(1).
+    """
+
+    def __init__(self):
+        self.sessions = {}
+        self.inference_seconds = DEFAULT_INFERENCE_SECONDS
+        self.nominal_demand = 0.0   # Frames analizados/s pedidos por todas las sesiones a tasa completa
+        self.low_risk_demand = 0.0  # Parte de nominal_demand que corresponde a sesiones de riesgo bajo
+        self.stage = 0
+        self._waiters = deque()  # Sesiones en cola (FIFO): (sesión, future que se resuelve al admitirla)
+        self._ids = itertools.count(1)
+        self.counters = {
+            "sessions_admitted": 0,
+            "sessions_queued": 0,
+            "sessions_rejected": 0,
+            "preview_frames_sent": 0,
+            "preview_frames_dropped": 0,
+            "degraded_jpeg_frames": 0,
+            "analysis_rate_reductions": 0,
+            "high_risk_escalations": 0,
+            "high_risk_deescalations": 0,
+        }
+        self.stage_changes = 0
+
+    def _capacity(self):
+        # Frames analizados por segundo que el nodo puede sostener
+        return INFERENCE_WORKERS / self.inference_seconds
+
+    def _nominal_stage(self):
+        utilization = self.nominal_demand / self._capacity()
+        if utilization >= ANALYSIS_STAGE_UTILIZATION:
+            return 2
+        if utilization >= PREVIEW_STAGE_UTILIZATION:
+            return 1
+        return 0
+
+    def _effective_demand(self, nominal_stage):
+        if nominal_stage < 2:
+            return self.nominal_demand
+        return self.nominal_demand - self.low_risk_demand * (1 - 1 / LOW_RISK_ANALYSIS_FACTOR)
+
+    def _admission_rate(self, session, nominal_stage):
+        # Una sesión nueva empieza como riesgo bajo
+        if nominal_stage >= 2:
+            return session.nominal_rate / LOW_RISK_ANALYSIS_FACTOR
+        return session.nominal_rate
+
+    def _fits(self, session):
+        nominal_stage = self._nominal_stage()
+        demand = self._effective_demand(nominal_stage)
+        # Si escalaciones a riesgo alto ya llevaron la carga efectiva al límite, no entra nadie
+        # hasta que alguna sesión se calme o termine
+        if demand / self._capacity() >= ADMISSION_UTILIZATION:
+            return False
+        demand += self._admission_rate(session, nominal_stage)
+        return demand / self._capacity() <= ADMISSION_UTILIZATION
+
+    def _update_stage(self):
+        nominal_stage = self._nominal_stage()
+        stage = nominal_stage
+        if self._waiters or self._effective_demand(nominal_stage) / self._capacity() >= ADMISSION_UTILIZATION:
+            stage = 3
+        if stage != self.stage:
+            print(f"Load stage changed: {self.stage} -> {stage}")
+            self.stage_changes += 1
+            self.stage = stage
+
+    def _register(self, session):
+        self.sessions[session.id] = session
+        self.nominal_demand += session.nominal_rate
+        self.low_risk_demand += session.nominal_rate
+        self.counters["sessions_admitted"] += 1
+        print(f"Admitted analysis session {session.id} for user {session.user_id}")
+
+    def _wake_waiters(self):
+        # Admite en orden de llegada mientras haya capacidad; nadie adelanta a la cabeza de la cola
+        while self._waiters and self._fits(self._waiters[0][0]):
+            session, future = self._waiters.popleft()
+            self._register(session)
+            future.set_result(True)
+        self._update_stage()
+
+    async def admit(self, websocket, user_id, base_every_n_frames):
+        """Registra una sesión nueva, esperando en cola (FIFO) si el nodo está saturado.
+
+        Devuelve la sesión, o None si fue rechazada (el cliente ya recibió el estado).
+        """
+        session = AnalysisSession(next(self._ids), user_id, base_every_n_frames)
+        if not self._waiters and self._fits(session):
+            self._register(session)
+            self._update_stage()
+            return session
+        if len(self._waiters) >= MAX_QUEUED_SESSIONS:
+            return await self._reject(websocket, user_id, "queue_full")
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (session, future)
+        self._waiters.append(entry)
+        self.counters["sessions_queued"] += 1
+        self._update_stage()
+        deadline = time.monotonic() + QUEUE_TIMEOUT_SECONDS
+        try:
+            while not future.done():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                await websocket.send_json({
+                    "status": "queued",
+                    "detail": "Servidor saturado, el análisis comenzará cuando haya capacidad",
+                    "position": self._waiters.index(entry) + 1,
+                    "queued_sessions": len(self._waiters)
+                })
+                try:
+                    await asyncio.wait_for(asyncio.shield(future), timeout=min(1.0, remaining))
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            # El cliente se desconectó mientras esperaba: libera su lugar (o su sesión, si ya fue admitida)
+            if future.done():
+                self.release(session)
+            else:
+                self._waiters.remove(entry)
+                self._wake_waiters()
+            raise
+
+        if future.done():
+            return session
+        self._waiters.remove(entry)
+        self._wake_waiters()
+        return await self._reject(websocket, user_id, "queue_timeout")
+
+    async def _reject(self, websocket, user_id, reason):
+        self.counters["sessions_rejected"] += 1
+        print(f"Rejected analysis session for user {user_id}: {reason}")
+        await websocket.send_json({
+            "status": "rejected",
+            "reason": reason,
+            "detail": "Servidor saturado, intenta nuevamente en unos minutos",
+            "retry_after": int(QUEUE_TIMEOUT_SECONDS)
+        })
+        return None
+
+    def release(self, session):
+        if self.sessions.pop(session.id, None) is None:
+            return
+        self.nominal_demand -= session.nominal_rate
+        if not session.high_risk:
+            self.low_risk_demand -= session.nominal_rate
+        self._wake_waiters()
+
+    def step(self, session, analyzer, indicators):
+        """Ajusta la sesión tras cada frame; devuelve (enviar_vista_previa, calidad_jpeg)."""
+        if analyzer.last_inference_seconds is not None:
+            self.inference_seconds += EWMA_ALPHA * (analyzer.last_inference_seconds - self.inference_seconds)
+            # La capacidad cambió con la nueva medición
+            self._wake_waiters()
+
+        self._update_risk(session, indicators)
+
+        stage = self.stage
+
+        # Los conductores de riesgo alto mantienen siempre la tasa completa de análisis
+        degrade = stage >= 2 and not session.high_risk
+        if degrade and not session.analysis_degraded:
+            self.counters["analysis_rate_reductions"] += 1
+        session.analysis_degraded = degrade
+        analyzer.process_every_n_frames = session.base_every_n_frames * (LOW_RISK_ANALYSIS_FACTOR if degrade else 1)
+
+        session.frame_count += 1
+        if stage >= 1:
+            if session.frame_count % PREVIEW_EVERY_N_FRAMES != 0:
+                self.counters["preview_frames_dropped"] += 1
+                return False, None
+            self.counters["preview_frames_sent"] += 1
+            self.counters["degraded_jpeg_frames"] += 1
+            return True, DEGRADED_JPEG_QUALITY
+        self.counters["preview_frames_sent"] += 1
+        return True, None
+
+    def _update_risk(self, session, indicators):
+        now = time.monotonic()
+        if indicators["microsleeps"] > HIGH_RISK_MICROSLEEPS or indicators["yawns"] > session.last_yawns:
+            session.last_risk_time = now
+        session.last_yawns = indicators["yawns"]
+        high_risk = session.last_risk_time is not None and now - session.last_risk_time < RISK_WINDOW_SECONDS
+        if high_risk == session.high_risk:
+            return
+        session.high_risk = high_risk
+        if high_risk:
+            self.low_risk_demand -= session.nominal_rate
+            self.counters["high_risk_escalations"] += 1
+            print(f"Session {session.id} escalated to high risk")
+            self._update_stage()
+        else:
+            self.low_risk_demand += session.nominal_rate
+            self.counters["high_risk_deescalations"] += 1
+            print(f"Session {session.id} back to low risk")
+            # Vuelve a tasa reducida: puede liberar capacidad para la cola
+            self._wake_waiters()
+
+    def metrics(self):
+        sessions = list(self.sessions.values())
+        capacity = self._capacity()
+        return {
+            "stage": self.stage,
+            "stage_changes": self.stage_changes,
+            "utilization": round(self.nominal_demand / capacity, 3),
+            "effective_utilization": round(self._effective_demand(self._nominal_stage()) / capacity, 3),
+            "capacity_fps": round(capacity, 2),
+            "inference_seconds": round(self.inference_seconds, 4),
+            "active_sessions": len(sessions),
+            "high_risk_sessions": sum(1 for session in sessions if session.high_risk),
+            "degraded_sessions": sum(1 for session in sessions if session.analysis_degraded),
+            "queued_sessions": len(self._waiters),
+            **self.counters,
+        }
+
+
+controller = LoadController()
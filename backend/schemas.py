@@ -41,6 +41,19 @@ class User(UserBase):
     class Config:
         orm_mode = True
 
+class UserListItem(BaseModel):
+    # Fila de GET /users/: con ?fields= solo se envían las columnas pedidas (además de id)
+    id: int
+    username: Optional[str] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
+    phone_number: Optional[str] = None
+    dni: Optional[str] = None
+    status: Optional[str] = None
+    role: Optional[str] = None
+    url_video: Optional[str] = None
+
 class Token(BaseModel):
     access_token: str
     token_type: str
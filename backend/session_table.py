@@ -0,0 +1,91 @@
+# session_table.py
+import threading
+import numpy as np
+
+
+class SessionTable:
+    """Estado de parpadeos, microsueños y bostezos de todas las sesiones en arrays NumPy.
+
+    Cada sesión ocupa un slot (índice) en arrays de tamaño fijo por campo; los
+    slots liberados se reutilizan. `update` avanza la máquina de estados de
+    varias sesiones en una sola operación vectorizada.
+    """
+
+    def __init__(self, capacity=64):
+        self._lock = threading.Lock()
+        self.capacity = 0
+        self.eyes_closed = np.zeros(0, dtype=bool)
+        self.yawn_in_progress = np.zeros(0, dtype=bool)
+        self.blinks = np.zeros(0, dtype=np.int32)
+        self.yawns = np.zeros(0, dtype=np.int32)
+        self.microsleeps = np.zeros(0, dtype=np.float64)
+        self.yawn_duration = np.zeros(0, dtype=np.float64)
+        self._free = []
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        for name in ("eyes_closed", "yawn_in_progress", "blinks", "yawns", "microsleeps", "yawn_duration"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        # Los slots nuevos se entregan en orden ascendente
+        self._free.extend(range(capacity - 1, self.capacity - 1, -1))
+        self.capacity = capacity
+
+    def allocate(self):
+        with self._lock:
+            if not self._free:
+                self._grow(self.capacity * 2)
+            slot = self._free.pop()
+            self.eyes_closed[slot] = False
+            self.yawn_in_progress[slot] = False
+            self.blinks[slot] = 0
+            self.yawns[slot] = 0
+            self.microsleeps[slot] = 0.0
+            self.yawn_duration[slot] = 0.0
+            return slot
+
+    def release(self, slot):
+        with self._lock:
+            self._free.append(slot)
+
+    @property
+    def active_sessions(self):
+        return self.capacity - len(self._free)
+
+    def update(self, slots, eyes_closed, yawning, elapsed):
+        """Avanza el estado de las sesiones `slots` (sin repetidos).
+
+        `eyes_closed` y `yawning` son booleanos por sesión (ambos ojos cerrados /
+        bostezo detectado) y `elapsed` los segundos de video cubiertos por el paso,
+        escalar o por sesión.
+        """
+        with self._lock:
+            slots = np.asarray(slots, dtype=np.intp)
+            eyes_closed = np.asarray(eyes_closed, dtype=bool)
+            yawning = np.asarray(yawning, dtype=bool)
+            elapsed = np.asarray(elapsed, dtype=np.float64)
+
+            # Parpadeo: flanco de subida de "ambos ojos cerrados"; el microsueño acumula mientras siguen cerrados
+            self.blinks[slots] += eyes_closed & ~self.eyes_closed[slots]
+            self.eyes_closed[slots] = eyes_closed
+            microsleeps = self.microsleeps[slots]
+            self.microsleeps[slots] = np.where(eyes_closed, microsleeps + elapsed, np.maximum(0.0, microsleeps - elapsed))
+
+            # Bostezo: flanco de subida de "Yawn"; la duración acumula mientras dura
+            self.yawns[slots] += yawning & ~self.yawn_in_progress[slots]
+            self.yawn_in_progress[slots] = yawning
+            self.yawn_duration[slots] += np.where(yawning, elapsed, 0.0)
+
+    def indicators(self, slot):
+        return {
+            "blinks": int(self.blinks[slot]),
+            "microsleeps": round(float(self.microsleeps[slot]), 2),
+            "yawns": int(self.yawns[slot]),
+            "yawn_duration": round(float(self.yawn_duration[slot]), 2)
+        }
+
+
+# Tabla compartida por todos los DrowsinessAnalyzer del proceso
+sessions = SessionTable()
@@ -1,28 +1,79 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Query, Response
 from sqlalchemy.orm import Session
+from typing import Optional
 from database import get_db
-from models import User, Role
-from schemas import User as UserSchema, UserCreate, UserUpdate
+from models import User, Role, Status
+from schemas import User as UserSchema, UserCreate, UserUpdate, UserListItem
 from auth import get_current_user, pwd_context
+import enum
+import users_version
 
 router = APIRouter()
 
+USER_FIELDS = list(UserSchema.model_fields)
+
 @router.get("/me", response_model=UserSchema)
 def read_current_user(current_user: User = Depends(get_current_user)):
     return current_user
 
-@router.get("/", response_model=list[UserSchema])
-def read_users(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+@router.get("/", response_model=list[UserListItem], response_model_exclude_unset=True)
+def read_users(
+    response: Response,
+    cursor: Optional[int] = Query(None, description="Id del último usuario de la página anterior"),
+    limit: int = Query(100, ge=1, le=500),
+    role: Optional[str] = None,
+    user_status: Optional[str] = Query(None, alias="status"),
+    fields: Optional[str] = Query(None, description="Columnas separadas por comas, p. ej. id,username,status"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
     if current_user.role != Role.admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+    selected = USER_FIELDS
+    if fields:
+        selected = [field.strip() for field in fields.split(",") if field.strip()]
+        invalid = [field for field in selected if field not in USER_FIELDS]
+        if invalid:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid fields: {', '.join(invalid)}")
+        if "id" not in selected:
+            selected = ["id"] + selected
+    try:
+        role_filter = Role(role) if role else None
+        status_filter = Status(user_status) if user_status else None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    # La lista no cambió desde la última respuesta: 304 sin consultar la tabla de usuarios
+    etag = users_version.etag()
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
     try:
-        users = db.query(User).all()
-        if not users:
-            return []
-        return users
+        query = db.query(*[getattr(User, field) for field in selected])
+        if role_filter:
+            query = query.filter(User.role == role_filter)
+        if status_filter:
+            query = query.filter(User.status == status_filter)
+        if cursor is not None:
+            query = query.filter(User.id > cursor)
+        rows = query.order_by(User.id).limit(limit + 1).all()
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error fetching users: {str(e)}")
 
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    users = [
+        UserListItem(**{field: value.value if isinstance(value, enum.Enum) else value for field, value in zip(selected, row)})
+        for row in rows
+    ]
+    if has_more:
+        headers["X-Next-Cursor"] = str(users[-1].id)
+    response.headers.update(headers)
+    return users
+
 @router.post("/", response_model=UserSchema)
 def create_user(user: UserCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     if current_user.role != Role.admin:
@@ -51,6 +102,7 @@ def create_user(user: UserCreate, db: Session = Depends(get_db), current_user: U
         )
         db.add(db_user)
         db.commit()
+        users_version.bump()
         db.refresh(db_user)
         return db_user
     except Exception as e:
@@ -83,6 +135,7 @@ def update_user(user_id: int, user: UserUpdate, db: Session = Depends(get_db), c
         for key, value in update_data.items():
             setattr(db_user, key, value)
         db.commit()
+        users_version.bump()
         db.refresh(db_user)
         return db_user
     except Exception as e:
@@ -99,6 +152,7 @@ def delete_user(user_id: int, db: Session = Depends(get_db), current_user: User
     try:
         db.delete(db_user)
         db.commit()
+        users_version.bump()
         return {"detail": "User deleted"}
     except Exception as e:
         db.rollback()
@@ -116,6 +170,7 @@ def update_user_video(user_id: int, url_video: str, db: Session = Depends(get_db
     try:
         db_user.url_video = url_video
         db.commit()
+        users_version.bump()
         db.refresh(db_user)
         return db_user
     except Exception as e:
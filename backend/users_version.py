@@ -0,0 +1,21 @@
+# users_version.py
+import itertools
+import threading
+import uuid
+
+# Versión de la lista de usuarios: se incrementa en cada alta, edición o baja.
+# Vive en memoria del proceso (un solo worker); el id de arranque invalida los ETag tras un reinicio.
+_boot_id = uuid.uuid4().hex[:8]
+_counter = itertools.count(1)
+_version = 0
+_lock = threading.Lock()
+
+
+def bump():
+    global _version
+    with _lock:
+        _version = next(_counter)
+
+
+def etag():
+    return f'"users-{_boot_id}-{_version}"'
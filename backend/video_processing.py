@@ -4,6 +4,8 @@ from database import get_db
 from models import User, VideoProcessing
 from auth import get_current_user
 from drowsiness_analyzer import DrowsinessAnalyzer
+import analysis_cache
+from load_controller import controller
 import asyncio
 import cv2
 import base64
@@ -11,9 +13,13 @@ import numpy as np
 
 router = APIRouter()
 
-async def encode_frame(frame):
+JPEG_PARAMS = [int(cv2.IMWRITE_JPEG_QUALITY), 50]
+
+async def encode_frame(frame, quality=None):
+    # El frame puede ser el buffer reutilizado del analizador: se codifica antes de pedir el siguiente
+    params = JPEG_PARAMS if quality is None else [int(cv2.IMWRITE_JPEG_QUALITY), quality]
     try:
-        _, buffer = await asyncio.to_thread(cv2.imencode, '.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), 50])
+        _, buffer = await asyncio.to_thread(cv2.imencode, '.jpg', frame, params)
         frame_b64 = base64.b64encode(buffer).decode('utf-8')
         print("Frame encoded successfully")
         return frame_b64
@@ -25,17 +31,45 @@ async def encode_frame(frame):
 async def analyze_video(websocket: WebSocket, user_id: int, db: Session = Depends(get_db)):
     await websocket.accept()
     analyzer = None
+    session = None
     try:
         user = db.query(User).filter(User.id == user_id).first()
         if not user or not user.url_video:
             await websocket.send_json({"error": "User not found or no video URL provided"})
             return
 
+        cache_key = None
+        cached = None
+        try:
+            cache_key = await asyncio.to_thread(DrowsinessAnalyzer.cache_key, user.url_video)
+            if cache_key:
+                cached = await asyncio.to_thread(analysis_cache.get, cache_key)
+        except Exception as e:
+            print(f"Error accessing analysis cache: {e}")
+        if cached:
+            # Resultado ya calculado para este video y estos modelos: no se vuelve a procesar ni se duplica el reporte
+            await websocket.send_json({
+                "indicators": cached["indicators"],
+                "timeline": cached["timeline"],
+                "cached": True
+            })
+            print(f"Sent cached analysis for user {user_id}")
+            await websocket.send_json({"status": "completed"})
+            return
+
+        session = await controller.admit(websocket, user_id, DrowsinessAnalyzer.PROCESS_EVERY_N_FRAMES)
+        if not session:
+            return
+
         analyzer = DrowsinessAnalyzer(user.url_video, user_id, db)
         for indicators, frame in analyzer.process_video_with_frames():
             try:
-                if frame is not None:
-                    frame_b64 = await encode_frame(frame)
+                send_preview, jpeg_quality = controller.step(session, analyzer, indicators)
+                if frame is not None and not send_preview:
+                    await websocket.send_json({"indicators": indicators})
+                    print("Sent indicators only (preview frame shed)")
+                elif frame is not None:
+                    frame_b64 = await encode_frame(frame, jpeg_quality)
                     if frame_b64:
                         await websocket.send_json({
                             "indicators": indicators,
@@ -52,6 +86,9 @@ async def analyze_video(websocket: WebSocket, user_id: int, db: Session = Depend
             except WebSocketDisconnect:
                 print("WebSocket disconnected during frame send")
                 break
+        # Solo se cachean análisis hechos a tasa completa
+        if cache_key and analyzer.completed and not analyzer.degraded:
+            await asyncio.to_thread(analysis_cache.put, cache_key, analyzer.indicators(), analyzer.timeline)
         await websocket.send_json({"status": "completed"})
     except WebSocketDisconnect:
         print("WebSocket disconnected")
@@ -62,12 +99,16 @@ async def analyze_video(websocket: WebSocket, user_id: int, db: Session = Depend
         except (WebSocketDisconnect, RuntimeError):
             print("Could not send error message: WebSocket already closed")
     finally:
+        if session:
+            controller.release(session)
         if analyzer:
             try:
                 analyzer.save_report()
                 print("Saved partial report for video analysis")
             except Exception as e:
                 print(f"Error saving report: {e}")
+            finally:
+                analyzer.close()
         try:
             await websocket.close()
         except RuntimeError:
@@ -77,6 +118,7 @@ async def analyze_video(websocket: WebSocket, user_id: int, db: Session = Depend
 async def analyze_realtime(websocket: WebSocket, user_id: int, db: Session = Depends(get_db)):
     await websocket.accept()
     analyzer = None
+    session = None
     try:
         user = db.query(User).filter(User.id == user_id).first()
         if not user:
@@ -99,13 +141,21 @@ async def analyze_realtime(websocket: WebSocket, user_id: int, db: Session = Dep
             raise ValueError(error_msg)
         cap.release()
 
+        session = await controller.admit(websocket, user_id, DrowsinessAnalyzer.PROCESS_EVERY_N_FRAMES)
+        if not session:
+            return
+
         analyzer = DrowsinessAnalyzer(selected_index, user_id, db, is_stream=True)
         frame_count = 0
         for indicators, frame in analyzer.process_video_with_frames():
             try:
                 frame_count += 1
-                if frame is not None:
-                    frame_b64 = await encode_frame(frame)
+                send_preview, jpeg_quality = controller.step(session, analyzer, indicators)
+                if frame is not None and not send_preview:
+                    await websocket.send_json({"indicators": indicators})
+                    print(f"Sent indicators only for frame {frame_count} (preview frame shed)")
+                elif frame is not None:
+                    frame_b64 = await encode_frame(frame, jpeg_quality)
                     if frame_b64:
                         await websocket.send_json({
                             "indicators": indicators,
@@ -132,17 +182,25 @@ async def analyze_realtime(websocket: WebSocket, user_id: int, db: Session = Dep
         except (WebSocketDisconnect, RuntimeError):
             print("Could not send error message: WebSocket already closed")
     finally:
+        if session:
+            controller.release(session)
         if analyzer:
             try:
                 analyzer.save_report()
                 print("Saved partial report for real-time analysis")
             except Exception as e:
                 print(f"Error saving report: {e}")
+            finally:
+                analyzer.close()
         try:
             await websocket.close()
         except RuntimeError:
             print("WebSocket already closed")
 
+@router.get("/metrics", response_model=dict)
+def get_metrics(current_user: User = Depends(get_current_user)):
+    return controller.metrics()
+
 @router.get("/reports", response_model=list[dict])
 def get_reports(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     try:
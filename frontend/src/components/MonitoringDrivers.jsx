@@ -9,6 +9,7 @@ function MonitoringDrivers() {
   const PERIODIC_CHECK_INTERVAL = 2500; // Periodic check every 10 seconds (in milliseconds)
 
   const [drivers, setDrivers] = useState([]);
+  const [nextDriversCursor, setNextDriversCursor] = useState(null);
   const [selectedDriver, setSelectedDriver] = useState(null);
   const [currentUser, setCurrentUser] = useState(null);
   const [showModal, setShowModal] = useState(false);
@@ -22,6 +23,7 @@ function MonitoringDrivers() {
   const [isCameraOn, setIsCameraOn] = useState(false);
   const [cameraError, setCameraError] = useState(null);
   const [videoError, setVideoError] = useState(null);
+  const [queueStatus, setQueueStatus] = useState(null); // Mensaje mientras el servidor tiene la sesión en cola
   const wsRef = useRef(null);
   const canvasRef = useRef(null);
   const lastFrameTimeRef = useRef(0);
@@ -103,11 +105,12 @@ function MonitoringDrivers() {
     };
   }, []);
 
-  const fetchDrivers = async () => {
+  // Sin cursor recarga la primera página; con cursor agrega la página siguiente
+  const fetchDrivers = async (cursor = null) => {
     try {
-      const response = await getUsers();
-      const driversList = response.filter(user => user.role === 'driver' && user.status === 'active');
-      setDrivers(driversList);
+      const response = await getUsers({ role: 'driver', status: 'active', ...(cursor ? { cursor } : {}) });
+      setDrivers(prev => (cursor ? [...prev, ...response.users] : response.users));
+      setNextDriversCursor(response.nextCursor);
     } catch (error) {
       Swal.fire({
         icon: 'error',
@@ -171,6 +174,7 @@ function MonitoringDrivers() {
       setIsCameraOn(true);
       setCameraError(null);
       setVideoError(null);
+      setQueueStatus(null);
 
       wsRef.current = connectToAnalysis(currentUser.id, true);
       wsRef.current.onmessage = (event) => {
@@ -184,6 +188,17 @@ function MonitoringDrivers() {
             text: data.error,
           });
           stopCamera();
+        } else if (data.status === 'rejected') {
+          setQueueStatus(null);
+          setVideoError(data.detail);
+          Swal.fire({
+            icon: 'warning',
+            title: 'Servidor saturado',
+            text: data.detail,
+          });
+          stopCamera();
+        } else if (data.status === 'queued') {
+          setQueueStatus(`Esperando capacidad del servidor (posición ${data.position} de ${data.queued_sessions})`);
         } else if (data.status === 'completed') {
           wsRef.current.close();
           Swal.fire({
@@ -192,6 +207,7 @@ function MonitoringDrivers() {
             text: 'El monitoreo en tiempo real ha finalizado.',
           });
         } else {
+          setQueueStatus(null);
           setIndicators(prev => ({
             blinks: data.indicators.blinks,
             microsleeps: Math.max(prev.microsleeps, data.indicators.microsleeps), // Only increase microsleeps
@@ -291,6 +307,7 @@ function MonitoringDrivers() {
       yawn_duration: 0,
     });
     setVideoError(null);
+    setQueueStatus(null);
     setShowModal(true);
     microsleepAlertCountRef.current = 0;
     yawnAlertCountRef.current = 0;
@@ -307,9 +324,21 @@ function MonitoringDrivers() {
           text: data.error,
         });
         handleCloseModal();
+      } else if (data.status === 'rejected') {
+        setQueueStatus(null);
+        setVideoError(data.detail);
+        Swal.fire({
+          icon: 'warning',
+          title: 'Servidor saturado',
+          text: data.detail,
+        });
+        handleCloseModal();
+      } else if (data.status === 'queued') {
+        setQueueStatus(`Esperando capacidad del servidor (posición ${data.position} de ${data.queued_sessions})`);
       } else if (data.status === 'completed') {
         wsRef.current.close();
       } else {
+        setQueueStatus(null);
         setIndicators(prev => ({
           blinks: data.indicators.blinks,
           microsleeps: Math.max(prev.microsleeps, data.indicators.microsleeps), // Only increase microsleeps
@@ -518,6 +547,13 @@ function MonitoringDrivers() {
             </div>
           </div>
         ))}
+        {nextDriversCursor && (
+          <div className="col-12 text-center mb-3">
+            <button className="btn btn-outline-primary" onClick={() => fetchDrivers(nextDriversCursor)}>
+              <i className="fa fa-angle-down me-2"></i>Cargar más conductores
+            </button>
+          </div>
+        )}
       </div>
 
       {showModal && selectedDriver && (
@@ -559,6 +595,7 @@ function MonitoringDrivers() {
                   </div>
                   <div className="col-md-6">
                     <h6>Cámara de Monitoreo</h6>
+                    {queueStatus && !videoError && <div className="alert alert-info">{queueStatus}</div>}
                     {videoError ? (
                       <div className="alert alert-danger">{videoError}</div>
                     ) : (
@@ -668,6 +705,7 @@ function MonitoringDrivers() {
                   </div>
                   <div className="col-md-6">
                     <h6>Cámara en Tiempo Real</h6>
+                    {queueStatus && !(cameraError || videoError) && <div className="alert alert-info">{queueStatus}</div>}
                     {cameraError || videoError ? (
                       <div className="alert alert-danger">{cameraError || videoError}</div>
                     ) : (
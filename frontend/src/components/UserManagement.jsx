@@ -7,6 +7,7 @@ function UserManagement() {
   const [users, setUsers] = useState([]);
   const [filteredUsers, setFilteredUsers] = useState([]);
   const [searchTerm, setSearchTerm] = useState('');
+  const [nextCursor, setNextCursor] = useState(null);
   const [form, setForm] = useState({ 
     username: '', 
     first_name: '', 
@@ -34,11 +35,12 @@ function UserManagement() {
     setFilteredUsers(filtered);
   }, [searchTerm, users]);
 
-  const fetchUsers = async () => {
+  // Sin cursor recarga la primera página; con cursor agrega la página siguiente
+  const fetchUsers = async (cursor = null) => {
     try {
-      const response = await getUsers();
-      setUsers(response);
-      setFilteredUsers(response);
+      const response = await getUsers(cursor ? { cursor } : {});
+      setUsers(prev => (cursor ? [...prev, ...response.users] : response.users));
+      setNextCursor(response.nextCursor);
     } catch (error) {
       let errorMessage = 'No se pudieron obtener los usuarios';
       if (error.response) {
@@ -389,6 +391,13 @@ function UserManagement() {
           </tbody>
         </table>
       </div>
+      {nextCursor && (
+        <div className="text-center mb-3">
+          <button className="btn btn-outline-primary" onClick={() => fetchUsers(nextCursor)}>
+            <i className="fa fa-angle-down me-2"></i>Cargar más
+          </button>
+        </div>
+      )}
     </div>
   );
 }
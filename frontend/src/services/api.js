@@ -23,9 +23,14 @@ export const register = async (data) => {
   return response.data;
 };
 
-export const getUsers = async () => {
-  const response = await api.get('/users/');
-  return response.data;
+// Una página de /users/. nextCursor (cabecera X-Next-Cursor) es null en la última página.
+// El navegador revalida la página con If-None-Match y reutiliza su copia cuando el servidor responde 304.
+export const getUsers = async (params = {}) => {
+  const response = await api.get('/users/', { params });
+  return {
+    users: response.data,
+    nextCursor: response.headers['x-next-cursor'] || null,
+  };
 };
 
 export const createUser = async (data) => {